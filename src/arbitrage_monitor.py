@@ -9,35 +9,61 @@ CS Odds Arbitrage Monitor — Headless (Playwright) edition
 
 Setup
 -----
-pip install requests beautifulsoup4 python-dateutil rapidfuzz pydantic playwright
+pip install "httpx[http2]" orjson selectolax python-dateutil rapidfuzz numpy pydantic playwright
 playwright install chromium
 
 Run
 ---
 python arbitrage_monitor.py
 
+Polling can be tuned with env vars: ARB_POLL_INTERVAL (base seconds, default 10),
+ARB_BACKOFF_MAX (cap for empty-result backoff, default 60), ARB_JITTER (default 0.5).
+
 Edit the selectors in PRESETS below if a site changes its HTML.
+
+Most books render odds from a JSON API. To find it, run
+python arbitrage_monitor.py --discover
+which loads each preset page once and lists JSON responses that look like odds
+feeds. Put the right one into the preset as "api_url" (plus an "api_fields"
+mapping) and that site is polled over plain HTTPS instead of Chromium.
 """
 from __future__ import annotations
 
+import os
+import re
 import time
+import asyncio
+import argparse
 import csv
 import math
 import random
 import logging
+import functools
+from contextlib import AsyncExitStack
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from urllib.parse import urlsplit
 
-import requests
-from bs4 import BeautifulSoup  # type: ignore
+import numpy as np
+import httpx
+from selectolax.lexbor import LexborHTMLParser, LexborNode  # type: ignore
 from rapidfuzz import fuzz, process  # type: ignore
 from dateutil import parser as dtparser  # type: ignore
 
+try:
+    import orjson  # type: ignore
+    _json_loads = orjson.loads
+except Exception:
+    import json
+    _json_loads = json.loads
+
 # ------------------------------
 # Config
 # ------------------------------
-POLL_INTERVAL_SECONDS = 10
+POLL_INTERVAL_SECONDS = float(os.environ.get("ARB_POLL_INTERVAL", 10))
+BACKOFF_MAX = float(os.environ.get("ARB_BACKOFF_MAX", 60))
+JITTER = float(os.environ.get("ARB_JITTER", 0.5))
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
@@ -45,18 +71,44 @@ USER_AGENT = (
 TIMEOUT = 12
 CSV_LOG_PATH = "arbitrage_log.csv"
 FUZZY_MATCH_THRESHOLD = 90
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--no-sandbox",
+    "--no-zygote",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-features=TranslateUI,BlinkGenPropertyTrees,IsolateOrigins,site-per-process",
+    "--blink-settings=imagesEnabled=false",
+]
+# Odds only need HTML + XHR; everything else is dropped at the route level.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+# Tracker domains, matched against the request hostname (and its subdomains) only, so an
+# odds XHR whose path or query happens to say "segment" is never caught.
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "hotjar.com", "hotjar.io", "segment.com", "segment.io",
+)
+_BLOCKED_HOST_SUFFIXES = tuple("." + host for host in BLOCKED_HOSTS)
+# URL fragments that suggest an odds feed when sniffing XHR in --discover mode.
+ODDS_ENDPOINT_HINTS = ("odds", "events", "line", "markets")
+# Recreate each site's long-lived page after this many polls to bound renderer memory growth.
+PAGE_RECYCLE_POLLS = 60
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
 
 # ------------------------------
 # Data Models
 # ------------------------------
-@dataclass
+@dataclass(slots=True)
 class Selection:
     name: str
     odds: float
 
-@dataclass
+@dataclass(slots=True)
 class EventOdds:
     match_id: str
     site: str
@@ -67,12 +119,6 @@ class EventOdds:
     team2: str
     odds_team1: float
     odds_team2: float
-    raw: dict = field(default_factory=dict)
-
-    def teams_key(self) -> Tuple[str, str]:
-        t1 = normalize_team(self.team1)
-        t2 = normalize_team(self.team2)
-        return tuple(sorted([t1, t2]))  # type: ignore
 
 # ------------------------------
 # Helpers
@@ -82,188 +128,481 @@ ALIASES: Dict[str, List[str]] = {
     # "ninjas in pyjamas": ["nip", "ninjas in pajamas"],
 }
 
-def normalize_team(name: str) -> str:
-    s = name.strip().lower()
-    s = s.replace("esports", "").replace("esport", "").replace("team", "").strip()
-    return s
-
-def alias_lookup(name: str) -> str:
-    norm = normalize_team(name)
-    best = norm
-    for canonical, alt_list in ALIASES.items():
-        choices = [canonical] + alt_list
-        match = process.extractOne(norm, choices, scorer=fuzz.token_set_ratio)  # type: ignore
-        if match and match[1] >= FUZZY_MATCH_THRESHOLD:
-            best = canonical
-            break
-    return best
+_STRIP_RE = re.compile(r"esports?|team")
+# first number in the text, including any space / "." / "," separators inside it
+_DECIMAL_RE = re.compile(r"[-+]?\d[\d .,\u00a0]*")
+# integer part written with one consistent group separator: 1 234 / 1,234 / 1.234.567
+_GROUPED_RE = re.compile(r"\d{1,3}([ .,\u00a0])\d{3}(?:\1\d{3})*")
+_DIGIT_RE = re.compile(r"\d")
 
+@functools.lru_cache(maxsize=8192)
+def normalize_team(name: str) -> str:
+    return _STRIP_RE.sub("", name.strip().lower()).strip()
+
+# Every alias (canonical included) in one flat list, with the owning canonical
+# at the same index, so a single RapidFuzz call can score against all of them.
+ALL_CHOICES: List[str] = [alt for canonical, alt_list in ALIASES.items() for alt in [canonical] + alt_list]
+CHOICE_TO_CANONICAL: List[str] = [canonical for canonical, alt_list in ALIASES.items() for _ in [canonical] + alt_list]
+# Exact-match reverse index (alias -> canonical), checked before any fuzzy scoring.
+_ALIAS_REVERSE: Dict[str, str] = dict(zip(ALL_CHOICES, CHOICE_TO_CANONICAL))
+
+# Every raw team name ever resolved -> canonical. Team names repeat across polls, so
+# steady-state cycles are pure dict hits and only brand-new names reach RapidFuzz.
+_ALIAS_MEMO: Dict[str, str] = {}
+_ALIAS_MEMO_MAX = 8192
+
+def alias_lookup_batch(names: List[str]) -> Dict[str, str]:
+    """Resolve many team names at once; the returned mapping covers every given name."""
+    memo = _ALIAS_MEMO
+    unseen = [raw for raw in dict.fromkeys(names) if raw not in memo]
+    if not unseen:
+        return memo
+    if len(memo) + len(unseen) > _ALIAS_MEMO_MAX:
+        memo.clear()
+        unseen = list(dict.fromkeys(names))
+    if not ALIASES:
+        for raw in unseen:
+            memo[raw] = normalize_team(raw)
+        return memo
+    misses: List[str] = []
+    for raw in unseen:
+        norm = normalize_team(raw)
+        memo[raw] = _ALIAS_REVERSE.get(norm, norm)
+        if norm not in _ALIAS_REVERSE:
+            misses.append(raw)
+    if not misses:
+        return memo
+    scores = process.cdist(
+        [memo[raw] for raw in misses], ALL_CHOICES, scorer=fuzz.token_set_ratio,
+        score_cutoff=FUZZY_MATCH_THRESHOLD, workers=-1,
+    )  # type: ignore
+    best = scores.argmax(axis=1)
+    for i, (raw, j) in enumerate(zip(misses, best)):
+        if scores[i, j] >= FUZZY_MATCH_THRESHOLD:
+            memo[raw] = CHOICE_TO_CANONICAL[j]
+    return memo
+
+@functools.lru_cache(maxsize=8192)
 def parse_decimal(txt: str) -> float:
-    s = txt.strip().replace(" ", " ")
-    keep = ''.join(ch for ch in s if (ch.isdigit() or ch in '.,'))
-    if keep.count(',') == 1 and keep.count('.') == 0:
-        keep = keep.replace(',', '.')
-    parts = keep.split('.')
-    if len(parts) > 2:
-        keep = parts[0] + '.' + ''.join(parts[1:])
-    return float(keep)
-
-def implied_prob(odds: float) -> float:
-    return 1.0 / odds
+    """Parse odds text like "1,85", "2.10" or "1 234.56".
+    The last "." or "," is the decimal separator; anything before it must be plain digits
+    or evenly grouped thousands. Mixed-up input ("21.852.10", "1.85 2.10") raises
+    ValueError so the row is dropped instead of yielding a wrong price.
+    """
+    m = _DECIMAL_RE.search(txt)
+    if m is None:
+        raise ValueError(f"no odds value in {txt!r}")
+    s = m.group(0).rstrip(" .,\u00a0")
+    sign = ""
+    if s[0] in "+-":
+        sign, s = s[0], s[1:]
+    cut = max(s.rfind("."), s.rfind(","))
+    int_part, frac = (s, "0") if cut < 0 else (s[:cut], s[cut + 1:])
+    if not frac.isdigit():
+        raise ValueError(f"ambiguous odds value in {txt!r}")
+    if not int_part.isdigit():
+        g = _GROUPED_RE.fullmatch(int_part)
+        if g is None or (cut >= 0 and g.group(1) == s[cut]):
+            raise ValueError(f"ambiguous odds value in {txt!r}")
+        int_part = int_part.replace(g.group(1), "")
+    return float(f"{sign}{int_part}.{frac}")
+
+def backoff_interval(empty_count: int) -> float:
+    # 10s -> 20s -> 40s -> capped, doubling per consecutive empty result
+    return min(BACKOFF_MAX, POLL_INTERVAL_SECONDS * 2 ** min(empty_count, 3))
 
 # ------------------------------
 # Adapters
 # ------------------------------
 class BaseAdapter:
     site_name: str = "base"
-
-    def fetch(self) -> List[EventOdds]:
+    match_id_prefix: str = "base"
+    url: str = ""
+    needs_browser: bool = False
+    # per-site backoff state, see record_result()
+    _consecutive_empty: int = 0
+    _next_fetch_at: float = 0.0
+
+    async def fetch(self, browser) -> List[EventOdds]:
         raise NotImplementedError
 
+    def is_due(self, now: float) -> bool:
+        return self._next_fetch_at <= now
+
+    def record_result(self, n_events: int, now: float) -> None:
+        """Reset backoff on any events; otherwise skip this site until its backoff expires."""
+        if n_events:
+            self._consecutive_empty = 0
+            self._next_fetch_at = 0.0
+        else:
+            self._consecutive_empty += 1
+            self._next_fetch_at = now + backoff_interval(self._consecutive_empty)
+
+    async def aclose(self) -> None:
+        pass
+
+    def _build_event(self, t1, t2, o1, o2, st_txt) -> Optional[EventOdds]:
+        # odds may be scraped text ("1,85") or numbers straight from a JSON payload
+        try:
+            if not (t1 and t2 and o1 and o2):
+                return None
+            o1 = float(o1) if isinstance(o1, (int, float)) else parse_decimal(o1)
+            o2 = float(o2) if isinstance(o2, (int, float)) else parse_decimal(o2)
+            start = None
+            if st_txt:
+                try:
+                    start = dtparser.parse(st_txt)
+                except Exception:
+                    start = None
+            return EventOdds(
+                match_id=f"{self.match_id_prefix}-{t1}-{t2}",
+                site=self.site_name,
+                sport="CS2",
+                league=None,
+                start_time=start,
+                team1=t1,
+                team2=t2,
+                odds_team1=o1,
+                odds_team2=o2,
+            )
+        except Exception:
+            return None
+
     @staticmethod
-    def _session() -> requests.Session:
-        s = requests.Session()
-        s.headers.update({"User-Agent": USER_AGENT})
-        return s
+    def _session() -> httpx.AsyncClient:
+        # keep-alive + HTTP/2, so repeat polls reuse one connection per host
+        return httpx.AsyncClient(
+            http2=True,
+            headers={"User-Agent": USER_AGENT},
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
 
 # Playwright adapter (headless browser)
 try:
-    from playwright.sync_api import sync_playwright  # type: ignore
+    from playwright.async_api import async_playwright  # type: ignore
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError  # type: ignore
     HAVE_PLAYWRIGHT = True
 except Exception:
     HAVE_PLAYWRIGHT = False
 
-class PlaywrightHTMLAdapter(BaseAdapter):
-    """Use a headless browser for JS-rendered odds pages.
+# Runs inside the page: uses the first container selector that matches anything, then
+# returns [team1, team2, odds1, odds2, start] per container, each being the first
+# non-empty text among that field's fallback selectors (or null). Text is built like
+# selectolax's text(strip=True) -- every text node trimmed, joined with no separator --
+# so the playwright and http engines yield identical team names and odds texts.
+_EXTRACT_JS = """
+([containerSels, fieldSels]) => {
+    let containers = [];
+    for (const csel of containerSels) {
+        containers = Array.from(document.querySelectorAll(csel));
+        if (containers.length) break;
+    }
+    const strippedText = (el) => {
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        let out = "";
+        while (walker.nextNode()) out += walker.currentNode.nodeValue.trim();
+        return out;
+    };
+    const firstText = (node, sels) => {
+        for (const sel of sels) {
+            const el = node.querySelector(sel);
+            const txt = el ? strippedText(el) : "";
+            if (txt) return txt;
+        }
+        return null;
+    };
+    return containers.map(node => fieldSels.map(sels => firstText(node, sels)));
+}
+"""
+
+async def _launch_browser(p):
+    return await p.chromium.launch(headless=True, args=CHROMIUM_ARGS, chromium_sandbox=False)
+
+async def _block_heavy_resources(route) -> None:
+    req = route.request
+    host = urlsplit(req.url).hostname or ""
+    if (req.resource_type in BLOCKED_RESOURCE_TYPES or host in BLOCKED_HOSTS
+            or host.endswith(_BLOCKED_HOST_SUFFIXES)):
+        await route.abort()
+    else:
+        await route.continue_()
+
+class SelectorHTMLAdapter(BaseAdapter):
+    """Shared selector handling for HTML odds pages.
     - selectors: dict with keys 'containers' (list[str]), 'team1', 'team2', 'odds1', 'odds2', optional 'start'
     Each of 'team*'/'odds*' can be a list[str] of alternative selectors. We'll try in order.
     """
-    site_name = "JSRenderedSite"
+    site_name = "HTMLSite"
+    match_id_prefix = "html"
 
-    def __init__(self, url: str, site_name: str, selectors: dict, wait_selector: Optional[str] = None):
+    def __init__(self, url: str, site_name: str, selectors: dict):
         self.url = url
         self.site_name = site_name
         self.selectors = selectors
-        self.wait_selector = wait_selector
-
-    def _first_text(self, node: BeautifulSoup, sels: List[str]) -> Optional[str]:
+        # selector lists are resolved once here instead of on every poll
+        self._container_sels: List[str] = list(selectors["containers"])
+        self._field_sels: List[List[str]] = [
+            list(selectors.get(k, []) or []) for k in ("team1", "team2", "odds1", "odds2", "start")
+        ]
+
+    def _first_text(self, node: LexborNode, sels: List[str]) -> Optional[str]:
+        # lexbor's node.css() also tests the node itself, unlike querySelector / select_one:
+        # a striped row <div class="event odd"> would otherwise "match" the odds selector
+        # ".odd" and hand back the whole row's text ("NaViG21.85" -> 21.85).
         for sel in sels:
-            el = node.select_one(sel)
-            if el:
-                txt = el.get_text(strip=True)
+            for el in node.css(sel):
+                if el == node:
+                    continue
+                txt = el.text(strip=True)
                 if txt:
                     return txt
         return None
 
     def _extract(self, html) -> List[EventOdds]:
-        soup = BeautifulSoup(html, "html.parser")
+        tree = LexborHTMLParser(html)
         results: List[EventOdds] = []
         containers = []
-        for csel in self.selectors["containers"]:
-            containers = soup.select(csel)
+        for csel in self._container_sels:
+            containers = tree.css(csel)
             if containers:
                 break
-        if not containers:
-            return results
-
-        team1_sels = self.selectors.get("team1", [])
-        team2_sels = self.selectors.get("team2", [])
-        odds1_sels = self.selectors.get("odds1", [])
-        odds2_sels = self.selectors.get("odds2", [])
-        start_sels = self.selectors.get("start", []) or []
 
         for match in containers:
+            ev = self._build_event(*(
+                self._first_text(match, sels) if sels else None for sels in self._field_sels
+            ))
+            if ev is not None:
+                results.append(ev)
+        return results
+
+class PlaywrightHTMLAdapter(SelectorHTMLAdapter):
+    """Use a headless browser for JS-rendered odds pages.
+    - js_required: False for pages whose odds are already in the server-rendered HTML but
+      that refuse plain HTTP clients (e.g. they filter on browser TLS/HTTP fingerprints rather
+      than a JS challenge); Chromium loads the page but none of the site's scripts run.
+    """
+    site_name = "JSRenderedSite"
+    match_id_prefix = "pw"
+    needs_browser = True
+
+    def __init__(self, url: str, site_name: str, selectors: dict, wait_selector: Optional[str] = None,
+                 js_required: bool = True):
+        super().__init__(url, site_name, selectors)
+        self.wait_selector = wait_selector
+        self.js_required = js_required
+        # Only used to wait for "a priced row is there": a comma union matches in document
+        # order, not selector priority, so extraction still walks the lists in order.
+        self._containers_css = ", ".join(self._container_sels)
+        self._odds1_css = ", ".join(self._field_sels[2])
+        # Without scripts nothing hydrates later, so the parsed DOM is the final one; with
+        # scripts, return at commit and wait for the odds themselves instead of load events.
+        self._wait_until = "commit" if js_required else "domcontentloaded"
+        self._ctx = None
+        self._page = None
+        self._polls = 0
+
+    async def _open_page(self, browser):
+        self._ctx = await browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 800, "height": 600},
+            device_scale_factor=1,
+            java_script_enabled=self.js_required,
+            ignore_https_errors=True,
+            bypass_csp=True,
+            service_workers="block",
+        )
+        await self._ctx.route("**/*", _block_heavy_resources)
+        self._page = await self._ctx.new_page()
+        self._polls = 0
+        await self._page.goto(self.url, wait_until=self._wait_until, timeout=TIMEOUT * 1000)
+
+    async def _close_page(self):
+        if self._ctx is not None:
             try:
-                t1 = self._first_text(match, team1_sels)
-                t2 = self._first_text(match, team2_sels)
-                o1_txt = self._first_text(match, odds1_sels)
-                o2_txt = self._first_text(match, odds2_sels)
-                if not (t1 and t2 and o1_txt and o2_txt):
-                    continue
-                o1 = parse_decimal(o1_txt)
-                o2 = parse_decimal(o2_txt)
-                start = None
-                if start_sels:
-                    st_txt = self._first_text(match, start_sels)
-                    if st_txt:
-                        try:
-                            start = dtparser.parse(st_txt)
-                        except Exception:
-                            start = None
-                results.append(EventOdds(
-                    match_id=f"pw-{t1}-{t2}",
-                    site=self.site_name,
-                    sport="CS2",
-                    league=None,
-                    start_time=start,
-                    team1=t1,
-                    team2=t2,
-                    odds_team1=o1,
-                    odds_team2=o2,
-                ))
+                await self._ctx.close()
             except Exception:
+                pass
+        self._ctx = None
+        self._page = None
+
+    async def aclose(self) -> None:
+        await self._close_page()
+
+    async def fetch(self, browser) -> List[EventOdds]:
+        # The context and page live across polls; later polls just reload the same URL.
+        try:
+            if self._page is None or self._polls >= PAGE_RECYCLE_POLLS:
+                await self._close_page()
+                await self._open_page(browser)
+            else:
+                await self._page.reload(wait_until=self._wait_until, timeout=TIMEOUT * 1000)
+            self._polls += 1
+            page = self._page
+            # An attached container may still be an unhydrated skeleton, so wait until some
+            # container holds an odds1 element showing a digit; nothing priced -> retry next poll.
+            ready = page.locator(self._containers_css)
+            if self._odds1_css:
+                ready = ready.locator(self._odds1_css).filter(has_text=_DIGIT_RE)
+            try:
+                await ready.first.wait_for(state="attached", timeout=6000)
+            except PlaywrightTimeoutError:
+                return []
+            # match selectors in the browser and ship back only the texts, not the DOM
+            rows = await page.evaluate(_EXTRACT_JS, [self._container_sels, self._field_sels])
+            results: List[EventOdds] = []
+            for row in rows:
+                ev = self._build_event(*row)
+                if ev is not None:
+                    results.append(ev)
+            return results
+        except Exception as e:
+            logging.warning(f"{self.site_name}: playwright fetch error: {e}")
+            await self._close_page()
+            return []
+
+class StaticHTMLAdapter(SelectorHTMLAdapter):
+    """Plain HTTPS GET + selectolax, for sites that render odds server-side."""
+    site_name = "StaticHTMLSite"
+    match_id_prefix = "http"
+
+    def __init__(self, url: str, site_name: str, selectors: dict):
+        super().__init__(url, site_name, selectors)
+        self.session = self._session()
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def fetch(self, browser) -> List[EventOdds]:
+        try:
+            resp = await self.session.get(self.url)
+            resp.raise_for_status()
+            return self._extract(resp.text)
+        except Exception as e:
+            logging.warning(f"{self.site_name}: http fetch error: {e}")
+            return []
+
+def _pick(obj, path: str):
+    """Walk a dotted path ("data.events.0.name") through nested dicts/lists."""
+    for part in path.split(".") if path else []:
+        if isinstance(obj, list):
+            obj = obj[int(part)]
+        else:
+            obj = obj[part]
+    return obj
+
+class JSONAPIAdapter(BaseAdapter):
+    """Poll a site's odds JSON endpoint directly.
+    - fields: dict of dotted paths. 'events' points at the list of matches in the payload;
+      'team1', 'team2', 'odds1', 'odds2' and optional 'start' are relative to one match.
+    """
+    site_name = "JSONAPISite"
+    match_id_prefix = "api"
+
+    def __init__(self, api_url: str, site_name: str, fields: dict):
+        self.api_url = api_url
+        self.site_name = site_name
+        self.url = api_url
+        self.fields = fields
+        self.session = self._session()
+        # validators + events from the last 200, replayed on 304 Not Modified
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._last_events: Optional[List[EventOdds]] = None
+
+    def _extract(self, payload) -> List[EventOdds]:
+        results: List[EventOdds] = []
+        f = self.fields
+        for item in _pick(payload, f.get("events", "")) or []:
+            try:
+                vals = [_pick(item, f[k]) for k in ("team1", "team2", "odds1", "odds2")]
+                st = _pick(item, f["start"]) if f.get("start") else None
+            except (KeyError, IndexError, TypeError, ValueError):
                 continue
+            # JSON null must stay missing, not become the truthy string "None"
+            t1, t2 = (None if v is None else str(v).strip() for v in vals[:2])
+            o1, o2 = (v if v is None or isinstance(v, (int, float)) else str(v) for v in vals[2:])
+            ev = self._build_event(t1, t2, o1, o2, None if st is None else str(st))
+            if ev is not None:
+                results.append(ev)
         return results
 
-    def fetch(self) -> List[EventOdds]:
-        if not HAVE_PLAYWRIGHT:
-            logging.error("Playwright not installed. Run: pip install playwright && playwright install chromium")
-            return []
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def fetch(self, browser) -> List[EventOdds]:
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                ctx = browser.new_context(user_agent=USER_AGENT)
-                page = ctx.new_page()
-                page.goto(self.url, wait_until="domcontentloaded")
-                # wait on any of the container selectors
-                waited = False
-                for csel in self.selectors["containers"]:
-                    try:
-                        page.wait_for_selector(csel, timeout=8000)
-                        waited = True
-                        break
-                    except Exception:
-                        continue
-                if not waited:
-                    page.wait_for_timeout(2000)
-                html = page.content()
-                ctx.close(); browser.close()
-                return self._extract(html)
+            headers = {}
+            if self._last_events is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+            resp = await self.session.get(self.api_url, headers=headers)
+            if resp.status_code == 304 and self._last_events is not None:
+                return list(self._last_events)
+            resp.raise_for_status()
+            events = self._extract(_json_loads(resp.content))
+            self._etag = resp.headers.get("ETag")
+            self._last_modified = resp.headers.get("Last-Modified")
+            self._last_events = events
+            return list(events)
         except Exception as e:
-            logging.warning(f"{self.site_name}: playwright fetch error: {e}")
+            logging.warning(f"{self.site_name}: api fetch error: {e}")
             return []
 
 # ------------------------------
 # Matching & Arbitrage
 # ------------------------------
 
-def group_by_match(events: List[EventOdds]) -> Dict[Tuple[str, str], List[EventOdds]]:
-    buckets: Dict[Tuple[str, str], List[EventOdds]] = {}
+def add_to_buckets(buckets: Dict[Tuple[str, str], List[EventOdds]], events: List[EventOdds]) -> None:
+    """Append events into buckets keyed by the alias-resolved team pair."""
+    canon = alias_lookup_batch([name for ev in events for name in (ev.team1, ev.team2)])
+    setdefault = buckets.setdefault  # bound once, hot loop below
     for ev in events:
-        k = tuple(sorted([alias_lookup(ev.team1), alias_lookup(ev.team2)]))  # type: ignore
-        buckets.setdefault(k, []).append(ev)
-    return buckets
+        t1 = canon[ev.team1]
+        t2 = canon[ev.team2]
+        setdefault((t1, t2) if t1 <= t2 else (t2, t1), []).append(ev)
 
 
-def detect_two_way_arbitrage(booklines: List[EventOdds]) -> Optional[dict]:
-    if not booklines:
-        return None
-    best_t1 = max(booklines, key=lambda e: e.odds_team1)
-    best_t2 = max(booklines, key=lambda e: e.odds_team2)
-    p_sum = implied_prob(best_t1.odds_team1) + implied_prob(best_t2.odds_team2)
-    if p_sum < 1.0:
-        margin = 1.0 - p_sum
-        return {
+def detect_arbitrage_all(
+    by_match: Dict[Tuple[str, str], List[EventOdds]]
+) -> List[Tuple[Tuple[str, str], dict]]:
+    """Find 2-way arbitrage across every bucket quoted by 2+ books in one vectorized pass.
+    Picks the best price per side (first book wins ties) and keeps rows whose implied
+    probabilities sum below 1.
+    """
+    keys = [k for k, booklines in by_match.items() if len(booklines) >= 2]
+    if not keys:
+        return []
+    width = max(len(by_match[k]) for k in keys)
+    odds1 = np.full((len(keys), width), np.nan)
+    odds2 = np.full((len(keys), width), np.nan)
+    for i, k in enumerate(keys):
+        for j, ev in enumerate(by_match[k]):
+            odds1[i, j] = ev.odds_team1
+            odds2[i, j] = ev.odds_team2
+    idx1 = np.nanargmax(odds1, axis=1)
+    idx2 = np.nanargmax(odds2, axis=1)
+    best_o1 = np.take_along_axis(odds1, idx1[:, None], 1)[:, 0]
+    best_o2 = np.take_along_axis(odds2, idx2[:, None], 1)[:, 0]
+    with np.errstate(divide="ignore"):
+        p_sum = 1.0 / best_o1 + 1.0 / best_o2
+    results: List[Tuple[Tuple[str, str], dict]] = []
+    for i in np.flatnonzero(p_sum < 1.0):
+        best_t1 = by_match[keys[i]][idx1[i]]
+        best_t2 = by_match[keys[i]][idx2[i]]
+        results.append((keys[i], {
             "team1": best_t1.team1,
             "team2": best_t2.team2,
             "site_team1": best_t1.site,
             "site_team2": best_t2.site,
             "odds_team1": best_t1.odds_team1,
             "odds_team2": best_t2.odds_team2,
-            "prob_sum": p_sum,
-            "margin": margin,
-        }
-    return None
+            "prob_sum": float(p_sum[i]),
+            "margin": 1.0 - float(p_sum[i]),
+        }))
+    return results
 
 
 def stake_split(total_stake: float, odds1: float, odds2: float) -> Tuple[float, float, float]:
@@ -279,11 +618,19 @@ def stake_split(total_stake: float, odds1: float, odds2: float) -> Tuple[float,
 # Site presets (selectors)
 # ------------------------------
 # These lists include multiple fallback selectors — the adapter tries them in order.
+# A preset may also carry "api_url" + "api_fields" (see JSONAPIAdapter); when present only the
+# JSON endpoint is polled and the selectors are ignored (a failed poll yields no events).
+# "engine" picks how the page is loaded: "playwright" (headless Chromium) or "http" (plain GET,
+# for server-rendered odds). Playwright presets can set "js_required": False to keep the
+# browser but skip the site's JavaScript.
+ENGINES = {"playwright", "http"}
 
 PRESETS = [
     {
         "site": "GG.BET",
         "url": "https://gg.bet/?sportId=esports_counter_strike",
+        "engine": "playwright",
+        "js_required": True,
         "selectors": {
             "containers": [
                 "[data-test='events-list'] .event-row",
@@ -315,6 +662,8 @@ PRESETS = [
     {
         "site": "Thunderpick",
         "url": "https://thunderpick.io/esports/cs2-betting",
+        "engine": "playwright",
+        "js_required": True,
         "selectors": {
             "containers": [
                 "[data-testid='events-list'] [data-testid='event-row']",
@@ -346,6 +695,8 @@ PRESETS = [
     {
         "site": "Beonbet",
         "url": "https://beonbet.com/no/sport?bt-path=/counter-strike/counter-strike-2/b--starladder-ss-fall-2025-eu-qualifier-2566766243860324375",
+        "engine": "playwright",
+        "js_required": True,
         "selectors": {
             "containers": [
                 "[data-test*='event'], [data-testid*='event']",
@@ -388,10 +739,11 @@ def ensure_csv_header(path: str):
         pass
 
 
-def log_opportunity(path: str, row: List):
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(row)
+def log_opportunities(f, writer, rows: List[List]):
+    # one write + flush per cycle on the file run() keeps open
+    if rows:
+        writer.writerows(rows)
+        f.flush()
 
 # ------------------------------
 # Main Loop
@@ -400,61 +752,137 @@ def log_opportunity(path: str, row: List):
 def presets_to_adapters() -> List[BaseAdapter]:
     adapters: List[BaseAdapter] = []
     for cfg in PRESETS:
-        adapters.append(PlaywrightHTMLAdapter(cfg["url"], cfg["site"], cfg["selectors"]))
+        engine = cfg.get("engine", "playwright")
+        if engine not in ENGINES:
+            raise ValueError(f"{cfg['site']}: unknown engine {engine!r}, expected one of {sorted(ENGINES)}")
+        if cfg.get("api_url"):
+            adapters.append(JSONAPIAdapter(cfg["api_url"], cfg["site"], cfg["api_fields"]))
+        elif engine == "http":
+            adapters.append(StaticHTMLAdapter(cfg["url"], cfg["site"], cfg["selectors"]))
+        else:
+            adapters.append(PlaywrightHTMLAdapter(
+                cfg["url"], cfg["site"], cfg["selectors"], js_required=cfg.get("js_required", True)
+            ))
     return adapters
 
-def run(total_stake: float = 400.0):
+async def discover_json_endpoints(browser, url: str, settle_ms: int = 8000) -> List[str]:
+    """Load a page once and collect JSON responses whose URL looks like an odds feed."""
+    found: List[str] = []
+
+    def on_response(resp):
+        ctype = resp.headers.get("content-type", "")
+        if "json" in ctype and any(h in resp.url.lower() for h in ODDS_ENDPOINT_HINTS) and resp.url not in found:
+            found.append(resp.url)
+
+    ctx = await browser.new_context(user_agent=USER_AGENT)
+    try:
+        page = await ctx.new_page()
+        page.on("response", on_response)
+        await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT * 1000)
+        await page.wait_for_timeout(settle_ms)
+    except Exception as e:
+        logging.warning(f"{url}: discovery error: {e}")
+    finally:
+        await ctx.close()
+    return found
+
+async def discover():
+    if not HAVE_PLAYWRIGHT:
+        logging.error("Playwright not installed. Run: pip install playwright && playwright install chromium")
+        return
+    async with async_playwright() as p:
+        browser = await _launch_browser(p)
+        try:
+            for cfg in PRESETS:
+                endpoints = await discover_json_endpoints(browser, cfg["url"])
+                logging.info(f"{cfg['site']}: {len(endpoints)} candidate odds endpoints")
+                for ep in endpoints:
+                    print(f"{cfg['site']}\t{ep}")
+        finally:
+            await browser.close()
+
+async def run(total_stake: float = 400.0):
     adapters: List[BaseAdapter] = presets_to_adapters()
+    needs_browser = any(ad.needs_browser for ad in adapters)
+    if needs_browser and not HAVE_PLAYWRIGHT:
+        logging.error("Playwright not installed. Run: pip install playwright && playwright install chromium")
+        return
     ensure_csv_header(CSV_LOG_PATH)
 
-    while True:
-        start_ts = time.time()
-        all_events: List[EventOdds] = []
+    async with AsyncExitStack() as stack:
+        browser = None
+        if needs_browser:
+            # one browser for every Playwright site, kept warm for the whole run
+            p = await stack.enter_async_context(async_playwright())
+            browser = await _launch_browser(p)
+            stack.push_async_callback(browser.close)
         for ad in adapters:
-            events = ad.fetch()
-            logging.info(f"Fetched {len(events)} events from {ad.site_name}")
-            all_events.extend(events)
-
-        by_match = group_by_match(all_events)
-        found = 0
-        for key, booklines in by_match.items():
-            if len(booklines) < 2:
-                continue
-            arb = detect_two_way_arbitrage(booklines)
-            if arb:
-                s1, s2, profit = stake_split(total_stake, arb["odds_team1"], arb["odds_team2"])
-                found += 1
-                t1, t2 = key
-                logging.warning(
-                    (
-                        f"ARB: {t1} vs {t2} | {arb['site_team1']} @ {arb['odds_team1']} / "
-                        f"{arb['site_team2']} @ {arb['odds_team2']} | margin={arb['margin']*100:.2f}% | "
-                        f"stakes: {s1}/{s2} | profit≈{profit}"
-                    )
-                )
-                log_opportunity(
-                    CSV_LOG_PATH,
-                    [
-                        datetime.now(timezone.utc).isoformat(),
-                        t1,
-                        t2,
-                        arb["site_team1"],
-                        arb["site_team2"],
-                        arb["odds_team1"],
-                        arb["odds_team2"],
-                        round(arb["prob_sum"], 5),
-                        round(arb["margin"], 5),
-                        s1,
-                        s2,
-                        profit,
-                    ],
-                )
-        if found == 0:
-            logging.info("No arbitrage this cycle.")
-
-        elapsed = time.time() - start_ts
-        sleep_for = max(0.0, POLL_INTERVAL_SECONDS - elapsed)
-        time.sleep(sleep_for + random.random() * 0.5)
+            stack.push_async_callback(ad.aclose)
+        log_file = stack.enter_context(open(CSV_LOG_PATH, "a", newline="", encoding="utf-8"))
+        log_writer = csv.writer(log_file)
+        empty_cycles = 0
+        while True:
+            start_ts = time.time()
+            n_events = await _run_cycle(browser, adapters, total_stake, log_file, log_writer)
+            # back off globally while every site comes back empty; snap back on any hit
+            empty_cycles = 0 if n_events else empty_cycles + 1
+            elapsed = time.time() - start_ts
+            sleep_for = max(0.0, backoff_interval(empty_cycles) - elapsed)
+            await asyncio.sleep(sleep_for + random.random() * JITTER)
+
+
+async def _run_cycle(browser, adapters: List[BaseAdapter], total_stake: float, log_file, log_writer) -> int:
+    start_ts = time.time()
+    due = [ad for ad in adapters if ad.is_due(start_ts)]
+    # Each site's events go straight into the shared buckets as soon as its fetch finishes.
+    # Everything runs on the one event-loop thread, so no locking is needed.
+    by_match: Dict[Tuple[str, str], List[EventOdds]] = {}
+
+    async def pull(ad: BaseAdapter) -> int:
+        events = await ad.fetch(browser)
+        logging.info(f"Fetched {len(events)} events from {ad.site_name}")
+        ad.record_result(len(events), start_ts)
+        add_to_buckets(by_match, events)
+        return len(events)
+
+    n_events = sum(await asyncio.gather(*(pull(ad) for ad in due)))
+    found = 0
+    rows: List[List] = []
+    for key, arb in detect_arbitrage_all(by_match):
+        s1, s2, profit = stake_split(total_stake, arb["odds_team1"], arb["odds_team2"])
+        found += 1
+        t1, t2 = key
+        logging.warning(
+            (
+                f"ARB: {t1} vs {t2} | {arb['site_team1']} @ {arb['odds_team1']} / "
+                f"{arb['site_team2']} @ {arb['odds_team2']} | margin={arb['margin']*100:.2f}% | "
+                f"stakes: {s1}/{s2} | profit≈{profit}"
+            )
+        )
+        rows.append([
+            datetime.now(timezone.utc).isoformat(),
+            t1,
+            t2,
+            arb["site_team1"],
+            arb["site_team2"],
+            arb["odds_team1"],
+            arb["odds_team2"],
+            round(arb["prob_sum"], 5),
+            round(arb["margin"], 5),
+            s1,
+            s2,
+            profit,
+        ])
+    log_opportunities(log_file, log_writer, rows)
+    if found == 0:
+        logging.info("No arbitrage this cycle.")
+    return n_events
 
 if __name__ == "__main__":
-    run(total_stake=400.0)
+    ap = argparse.ArgumentParser(description="CS odds arbitrage monitor")
+    ap.add_argument("--discover", action="store_true", help="list candidate JSON odds endpoints per preset and exit")
+    args = ap.parse_args()
+    if args.discover:
+        asyncio.run(discover())
+    else:
+        asyncio.run(run(total_stake=400.0))